@@ -3,3 +3,18 @@ SECRET_KEY = 'you-will-never-guess'
 
 DB_HOST = 'localhost'
 DB_PORT = '5432'
+DB_USER = 'postgres'
+DB_PASSWORD = 'postgres'
+DB_NAME = 'catalog_summary'
+# Overrides the URL built from the values above, e.g. 'sqlite:///summary.db'
+DB_URL = None
+
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+DB_POOL_TIMEOUT = 30
+DB_POOL_RECYCLE = 1800
+
+# Profiling of crawler/aggregator runs, also switched by the CATALOG_PROFILING
+# environment variable. Output goes to <summary_dir>.profile/
+PROFILING = False
+PROFILING_SLOWEST = 20
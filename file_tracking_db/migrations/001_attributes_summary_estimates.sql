@@ -0,0 +1,5 @@
+-- Estimated totals and 95% confidence bounds from sampling crawls,
+-- NULL for summaries built from a full crawl.
+ALTER TABLE attributes_summary ADD COLUMN IF NOT EXISTS estimated_total DOUBLE PRECISION;
+ALTER TABLE attributes_summary ADD COLUMN IF NOT EXISTS estimated_total_low DOUBLE PRECISION;
+ALTER TABLE attributes_summary ADD COLUMN IF NOT EXISTS estimated_total_high DOUBLE PRECISION;
@@ -3,6 +3,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String, Float, Boolean, Sequence, ForeignKey
 from sqlalchemy.orm import sessionmaker
 
+Base = declarative_base()
+
 
 class FileAttributes(Base):
     __tablename__ = "files_attrs_table"
@@ -23,4 +25,7 @@ class AttributesSummary(Base):
     plot_minimum = Column(Float)
     plot_maximum = Column(Float)
     plot_values = Column(String)
-    is_numeric = Column(Boolean)
\ No newline at end of file
+    is_numeric = Column(Boolean)
+    estimated_total = Column(Float)
+    estimated_total_low = Column(Float)
+    estimated_total_high = Column(Float)
@@ -0,0 +1,115 @@
+"""
+Startup-time and requests-per-second benchmark for the shared database engine.
+
+Uses a temporary SQLite file as a stand-in for the Postgres summary database:
+
+    python bench_database.py [--requests 2000]
+
+Startup time is the cost of importing the catalog helpers in a fresh
+interpreter ('lazy'), against importing up front the SQLAlchemy and pyCGA
+modules they loaded at import time before ('eager'). Requests per second
+compares building an engine for every unit of work (the old CatalogAggregator
+behaviour) with the pooled session from web.catalog_helper.database.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'web', 'catalog_helper'))
+sys.path.insert(0, os.path.dirname(HERE))
+
+QUERY = "SELECT count(*) FROM attributes_summary"
+
+# What each module imported at module level before the imports were made lazy
+EAGER_IMPORTS = {
+    'catalog_aggregator': ['sqlalchemy', 'sqlalchemy.ext.declarative', 'sqlalchemy.orm'],
+    'catalog_utils': ['pyCGA.opencgaconfig', 'pyCGA.opencgarestclients'],
+}
+
+
+def startup_time(modules, repeats=5):
+    """
+    Best wall time over repeats of importing modules in a fresh interpreter,
+    or None if the import fails (e.g. a module is not installed).
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.join(HERE, 'web', 'catalog_helper'),
+                                         os.path.dirname(HERE)])
+    best = None
+    for _ in range(repeats):
+        start = time.time()
+        try:
+            subprocess.check_call([sys.executable, '-c', 'import ' + ', '.join(modules)], env=env)
+        except subprocess.CalledProcessError:
+            return None
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def engine_per_request(url, requests):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+    start = time.time()
+    for _ in range(requests):
+        session = sessionmaker(bind=create_engine(url))()
+        session.execute(text(QUERY))
+        session.close()
+    return requests / (time.time() - start)
+
+
+def shared_engine(url, requests):
+    from sqlalchemy import text
+    from sqlalchemy.pool import QueuePool
+    import database
+    database.dispose()
+    # SQLite would otherwise get its default pool, use the one Postgres gets
+    database.get_engine(url, poolclass=QueuePool, **database.tuned_pool_options())
+    start = time.time()
+    for _ in range(requests):
+        database.get_session().execute(text(QUERY))
+        database.remove_session()
+    rate = requests / (time.time() - start)
+    database.dispose()
+    return rate
+
+
+def print_startup(module, mode, seconds):
+    if seconds is None:
+        print("startup  {:<20} {:<6} failed to import, see error above".format(module, mode))
+    else:
+        print("startup  {:<20} {:<6} {:8.3f} s".format(module, mode, seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    url = 'sqlite:///' + db_file.name
+    try:
+        from sqlalchemy import create_engine, text
+        engine = create_engine(url)
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE attributes_summary (id INTEGER PRIMARY KEY)"))
+        engine.dispose()
+
+        for module, eager_imports in sorted(EAGER_IMPORTS.items()):
+            print_startup(module, 'lazy', startup_time([module]))
+            print_startup(module, 'eager', startup_time(eager_imports + [module]))
+        print("requests engine per request  {:10.1f} req/s".format(
+            engine_per_request(url, args.requests)))
+        print("requests shared pooled engine {:9.1f} req/s".format(
+            shared_engine(url, args.requests)))
+    finally:
+        os.remove(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
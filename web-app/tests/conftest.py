@@ -0,0 +1,52 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'web', 'catalog_helper'))
+
+
+class FakeConnector:
+    """Stands in for BerthaOpenCGA: samples is a list of sample dictionaries and
+    files maps a sample name to the files linked to it."""
+
+    def __init__(self, samples, files):
+        self.samples = samples
+        self.files = files
+
+    def get_all_samples(self, limit=None):
+        return self.samples if limit is None else self.samples[:limit]
+
+    def file_get_all_associated_with_sample(self, sample):
+        return self.files.get(sample, [])
+
+
+@pytest.fixture
+def connector():
+    return FakeConnector
+
+
+@pytest.fixture
+def crawl_dir(tmpdir):
+    tmpdir.mkdir('summary')
+    tmpdir.join('samples').write('')
+    return tmpdir
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger('catalog_tests')
+
+
+@pytest.fixture
+def db(tmpdir):
+    """The shared engine bound to an empty SQLite summary database."""
+    pytest.importorskip('sqlalchemy')
+    import database
+    from schemas import Base
+    database.dispose()
+    Base.metadata.create_all(database.get_engine('sqlite:///' + str(tmpdir.join('summary.db'))))
+    yield database
+    database.dispose()
@@ -0,0 +1,49 @@
+import pytest
+
+from catalog_aggregator import Aggregated, CatalogAggregator
+from sampling import StratifiedSampling
+
+
+@pytest.fixture
+def sampling_file(tmpdir):
+    sampling = StratifiedSampling(0.5, str(tmpdir.join('samples.sampling')), seed=1)
+    sampling.strata = {'all': {'population': 4, 'sampled': 2}}
+    sampling.totals = {'data;a.bam:format': {'all': [3, 5]}}
+    sampling.save()
+    return str(tmpdir.join('samples.sampling'))
+
+
+@pytest.fixture
+def summary_dir(tmpdir):
+    summary_dir = tmpdir.mkdir('summary')
+    summary_dir.join('1').write('data;a.bam:format\n\nBAM\nBAM\nCRAM\n')
+    return str(summary_dir)
+
+
+def test_add_estimate_uses_the_sampling_state(summary_dir, sampling_file, logger):
+    aggregator = CatalogAggregator(summary_dir, logger, sampling_file=sampling_file)
+    aggregated = Aggregated('data;a.bam:format\n', 0, 0, False, [], [])
+    aggregator.add_estimate(aggregated)
+    # N / n * sum = 4 / 2 * 3, s^2 = (5 - 2 * 1.5^2) / 1 = 0.5
+    assert aggregated.estimated_total == pytest.approx(6)
+    margin = 1.96 * (4 * 4 * (1 - 2.0 / 4) * 0.5 / 2) ** 0.5
+    assert aggregated.estimated_total_low == pytest.approx(6 - margin)
+    assert aggregated.estimated_total_high == pytest.approx(6 + margin)
+
+
+def test_add_estimate_without_sampling_leaves_no_estimate(summary_dir, logger):
+    aggregated = Aggregated('data;a.bam:format\n', 0, 0, False, [], [])
+    CatalogAggregator(summary_dir, logger).add_estimate(aggregated)
+    assert aggregated.estimated_total is None
+
+
+def test_aggregate_stores_summaries_with_estimates(summary_dir, sampling_file, logger, db):
+    from schemas import AttributesSummary, FileAttributes
+    CatalogAggregator(summary_dir, logger, sampling_file=sampling_file).aggregate()
+    session = db.get_session()
+    summary = session.query(AttributesSummary).one()
+    assert summary.plot_values == str([('BAM', 2), ('CRAM', 1)])
+    assert summary.estimated_total == pytest.approx(6)
+    file_attributes = session.query(FileAttributes).one()
+    assert file_attributes.attr_id == summary.id
+    assert file_attributes.file_path == 'data;a.bam'
@@ -0,0 +1,55 @@
+from catalog_crawler import CatalogCrawler
+from file_index import ProcessedFilesIndex
+
+
+def run_crawl(connector, crawl_dir, logger):
+    crawler = CatalogCrawler(connector, str(crawl_dir.join('summary')), logger,
+                             str(crawl_dir.join('samples')))
+    crawler.summarize()
+    return crawler
+
+
+def shared_file_catalog(connector):
+    shared = {'id': 1, 'path': 'run/shared.txt', 'size': 10}
+    return connector([{'name': 'LP1'}, {'name': 'LP2'}],
+                     {'LP1': [shared, {'id': 2, 'path': 'LP1/a.bam', 'size': 1}],
+                      'LP2': [shared, {'id': 3, 'path': 'LP2/a.bam', 'size': 2}]})
+
+
+def test_shared_file_is_summarized_once(connector, crawl_dir, logger):
+    crawler = run_crawl(shared_file_catalog(connector), crawl_dir, logger)
+    assert crawler.added_files == 3
+    assert crawler.repeated_files == 1
+    assert len(crawl_dir.join('samples.files').readlines()) == 3
+
+
+def test_index_is_reset_with_an_empty_samples_file(connector, crawl_dir, logger):
+    run_crawl(shared_file_catalog(connector), crawl_dir, logger)
+    crawl_dir.join('samples').write('')
+    crawler = run_crawl(shared_file_catalog(connector), crawl_dir, logger)
+    assert crawler.added_files == 3
+    assert crawler.repeated_files == 1
+
+
+def test_index_is_kept_when_resuming(connector, crawl_dir, logger):
+    run_crawl(shared_file_catalog(connector), crawl_dir, logger)
+    crawl_dir.join('samples').write('LP1\n')
+    crawler = run_crawl(shared_file_catalog(connector), crawl_dir, logger)
+    assert crawler.added_files == 0
+    assert crawler.repeated_files == 2
+
+
+def test_digests_are_only_written_with_the_sample(connector, crawl_dir, logger):
+    crawler = CatalogCrawler(shared_file_catalog(connector), str(crawl_dir.join('summary')),
+                             logger, str(crawl_dir.join('samples')))
+    crawler.process_files([{'id': 1, 'path': 'run/shared.txt'}])
+    assert crawl_dir.join('samples.files').read() == ''
+    crawler.files_index.commit()
+    assert len(crawl_dir.join('samples.files').readlines()) == 1
+
+
+def test_non_ascii_keys_are_hashed(tmpdir):
+    index = ProcessedFilesIndex(str(tmpdir.join('index')))
+    assert index.add({'id': u'\xe9', 'path': u'r\xe9sum\xe9.txt'})
+    assert not index.add({'id': u'\xe9', 'path': u'other.txt'})
+    assert index.add({'checksum': u'éè', 'path': 'a.txt'})
@@ -0,0 +1,88 @@
+import json
+import sys
+import tracemalloc
+import types
+
+import pytest
+
+import profiling
+from catalog_aggregator import CatalogAggregator
+from catalog_crawler import CatalogCrawler
+from profiling import ENV_VARIABLE
+
+
+def run_crawl(connector, crawl_dir, logger):
+    samples = [{'name': 'LP{}'.format(i)} for i in range(5)]
+    files = dict((sample['name'], [{'id': sample['name'], 'path': 'data/a.bam', 'size': 1}])
+                 for sample in samples)
+    CatalogCrawler(connector(samples, files), str(crawl_dir.join('summary')), logger,
+                   str(crawl_dir.join('samples'))).summarize()
+
+
+def test_disabled_profiling_writes_nothing(connector, crawl_dir, logger, monkeypatch):
+    monkeypatch.setenv(ENV_VARIABLE, '0')
+    run_crawl(connector, crawl_dir, logger)
+    assert not crawl_dir.join('summary.profile').check()
+    assert not tracemalloc.is_tracing()
+
+
+def test_enabled_profiling_writes_report(connector, crawl_dir, logger, monkeypatch):
+    monkeypatch.setenv(ENV_VARIABLE, '1')
+    run_crawl(connector, crawl_dir, logger)
+    profile_dir = crawl_dir.join('summary.profile')
+    assert sorted(path.basename for path in profile_dir.listdir()) == [
+        'crawl.json', 'crawl_get_samples.prof', 'crawl_samples.prof']
+    report = json.loads(profile_dir.join('crawl.json').read())
+    assert sorted(report['stages']) == ['crawl_get_samples', 'crawl_samples']
+    assert len(report['slowest']['sample']) == 5
+    for stage in report['stages'].values():
+        for allocation in stage['memory']['top_allocations']:
+            assert 'cProfile.py' not in allocation['location']
+            assert 'profiling.py' not in allocation['location']
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiling_stops_tracing_when_the_crawl_fails(connector, crawl_dir, logger, monkeypatch):
+    monkeypatch.setenv(ENV_VARIABLE, '1')
+
+    class Failing(connector):
+        def file_get_all_associated_with_sample(self, sample):
+            raise RuntimeError("catalog down")
+
+    with pytest.raises(RuntimeError):
+        run_crawl(Failing, crawl_dir, logger)
+    assert crawl_dir.join('summary.profile', 'crawl.json').check()
+    assert not tracemalloc.is_tracing()
+
+
+def test_aggregate_stages_are_profiled(tmpdir, logger, monkeypatch, db):
+    monkeypatch.setenv(ENV_VARIABLE, '1')
+    tmpdir.mkdir('summary').join('1').write('data;a.bam:format\n\nBAM\nCRAM\n')
+    CatalogAggregator(str(tmpdir.join('summary')), logger).aggregate()
+    profile_dir = tmpdir.join('summary.profile')
+    assert sorted(path.basename for path in profile_dir.listdir()) == [
+        'aggregate.json', 'aggregate_files.prof', 'aggregate_store.prof']
+    report = json.loads(profile_dir.join('aggregate.json').read())
+    assert sorted(report['stages']) == ['aggregate_files', 'aggregate_store']
+    assert [item['name'] for item in report['slowest']['summary_file']] == ['1']
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiling_is_enabled_from_config(monkeypatch):
+    monkeypatch.delenv(ENV_VARIABLE, raising=False)
+    config = types.ModuleType('config')
+    config.PROFILING = True
+    config.PROFILING_SLOWEST = 3
+    monkeypatch.setitem(sys.modules, 'config', config)
+    assert profiling.is_enabled()
+    assert profiling.slowest_limit() == 3
+
+
+def test_unreadable_config_is_reported(monkeypatch, caplog):
+    monkeypatch.delenv(ENV_VARIABLE, raising=False)
+
+    def missing():
+        raise ImportError("no config.py")
+    monkeypatch.setattr(profiling, 'load_config', missing)
+    assert not profiling.is_enabled()
+    assert 'PROFILING' in caplog.text
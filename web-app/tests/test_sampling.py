@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from catalog_crawler import CatalogCrawler
+from sampling import StratifiedSampling, load_estimates
+
+SAMPLES = 40
+
+
+def catalog(connector):
+    """Every sample has its own bam, sample i has i % 3 extra vcfs and all of them
+    share one run level file. The distinct totals are known exactly."""
+    samples = [{'name': 'LP{}'.format(i), 'somatic': i % 2 == 0} for i in range(SAMPLES)]
+    shared = {'id': 'shared', 'path': 'shared/run.txt', 'size': 1,
+              'samples': [{'id': sample['name']} for sample in samples]}
+    files = {}
+    for i, sample in enumerate(samples):
+        own = [{'id': 'bam{}'.format(i), 'path': 'data/own.bam', 'size': i}]
+        extra = [{'id': 'vcf{}-{}'.format(i, j), 'path': 'data/extra.vcf', 'size': j}
+                 for j in range(i % 3)]
+        files[sample['name']] = [shared] + own + extra
+    return connector(samples, files)
+
+
+TRUE_TOTALS = {
+    'shared;run.txt:size': 1,
+    'data;own.bam:size': SAMPLES,
+    'data;extra.vcf:size': sum(i % 3 for i in range(SAMPLES)),
+}
+
+
+def sampled_estimates(connector, crawl_dir, logger, fraction, seed):
+    crawler = CatalogCrawler(catalog(connector), str(crawl_dir.join('summary')), logger,
+                             str(crawl_dir.join('samples')), sample_fraction=fraction,
+                             stratify_by='somatic', sampling_seed=seed)
+    crawler.summarize()
+    return load_estimates(str(crawl_dir.join('samples.sampling')))
+
+
+def test_full_sample_gives_exact_totals(connector, crawl_dir, logger):
+    estimates = sampled_estimates(connector, crawl_dir, logger, 1, seed=0)
+    for path, total in TRUE_TOTALS.items():
+        assert estimates[path] == pytest.approx((total, total, total))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sampled_estimates_cover_the_population(connector, tmpdir, logger, seed):
+    tmpdir.mkdir('summary')
+    tmpdir.join('samples').write('')
+    estimates = sampled_estimates(connector, tmpdir, logger, 0.25, seed)
+    assert estimates['shared;run.txt:size'][0] == pytest.approx(1)
+    assert estimates['data;own.bam:size'][0] == pytest.approx(SAMPLES)
+    total, low, high = estimates['data;extra.vcf:size']
+    assert low <= TRUE_TOTALS['data;extra.vcf:size'] <= high
+
+
+def test_populations_are_saved_before_crawling(connector, crawl_dir, logger):
+    crawler = CatalogCrawler(catalog(connector), str(crawl_dir.join('summary')), logger,
+                             str(crawl_dir.join('samples')), sample_fraction=0.25,
+                             stratify_by='somatic', sampling_seed=0)
+    crawler.summarize_sample = lambda sample: None
+    crawler.summarize()
+    strata = crawler.sampling.load_state(str(crawl_dir.join('samples.sampling')))['strata']
+    assert strata == {'cancer': {'population': 20, 'sampled': 0},
+                      'normal': {'population': 20, 'sampled': 0}}
+
+
+def test_sampling_refuses_a_truncated_population(connector, crawl_dir, logger):
+    crawler = CatalogCrawler(catalog(connector), str(crawl_dir.join('summary')), logger,
+                             str(crawl_dir.join('samples')), sample_fraction=0.25)
+    crawler.sampling_population_limit = SAMPLES
+    with pytest.raises(ValueError):
+        crawler.summarize()
+
+
+def test_sample_limit_and_fraction_are_exclusive(connector, crawl_dir, logger):
+    with pytest.raises(ValueError):
+        CatalogCrawler(catalog(connector), str(crawl_dir.join('summary')), logger,
+                       str(crawl_dir.join('samples')), sample_limit=10, sample_fraction=0.25)
+
+
+def test_resumed_crawl_draws_the_same_samples(connector, crawl_dir, logger):
+    samples = [{'name': 'LP{}'.format(i)} for i in range(100)]
+    files = dict((sample['name'], [{'id': sample['name'], 'path': 'data/a.bam', 'size': 1}])
+                 for sample in samples)
+
+    class FailingOnce(connector):
+        calls = 0
+
+        def file_get_all_associated_with_sample(self, sample):
+            FailingOnce.calls += 1
+            if FailingOnce.calls == 6:
+                raise RuntimeError("catalog down")
+            return connector.file_get_all_associated_with_sample(self, sample)
+
+    def crawl():
+        CatalogCrawler(FailingOnce(samples, files), str(crawl_dir.join('summary')), logger,
+                       str(crawl_dir.join('samples')), sample_fraction=0.1).summarize()
+
+    with pytest.raises(RuntimeError):
+        crawl()
+    crawl()
+    state = StratifiedSampling.load_state(str(crawl_dir.join('samples.sampling')))
+    assert state['strata'] == {'all': {'population': 100, 'sampled': 10}}
+    assert len(crawl_dir.join('samples').readlines()) == 10
+
+
+def test_resuming_with_another_seed_fails(tmpdir):
+    state_file = str(tmpdir.join('state'))
+    StratifiedSampling(0.5, state_file, seed=1).save()
+    assert StratifiedSampling(0.5, state_file).seed == 1
+    with pytest.raises(ValueError):
+        StratifiedSampling(0.5, state_file, seed=2)
+
+
+def test_interrupted_save_keeps_the_previous_state(tmpdir, monkeypatch):
+    state_file = str(tmpdir.join('state'))
+    sampling = StratifiedSampling(0.5, state_file, seed=1)
+    sampling.select([{'name': 'LP1'}, {'name': 'LP2'}])
+    sampling.save()
+
+    def crash(*args, **kwargs):
+        raise IOError("disk full")
+    monkeypatch.setattr(json, 'dump', crash)
+    with pytest.raises(IOError):
+        sampling.save()
+    monkeypatch.undo()
+    assert StratifiedSampling.load_state(state_file)['strata'] == {
+        'all': {'population': 2, 'sampled': 0}}
@@ -3,6 +3,8 @@
 from flask import Blueprint
 from flask_restful import Api
 
+from catalog_helper import database
+
 # :pylint: disable=invalid-name
 
 #app = Flask(__name__)
@@ -19,4 +21,11 @@ api_blueprint = Blueprint(
 
 api = Api(api_blueprint)
 
+
+@api_blueprint.teardown_request
+def remove_db_session(exception=None):
+    """Hands the request's database connection back to the shared pool."""
+    database.remove_session()
+
+
 import views  # noqa
@@ -1,8 +1,19 @@
+import os
 import re
 
+from file_index import ProcessedFilesIndex
+from profiling import Profiler
+from sampling import StratifiedSampling
+
 
 class CatalogCrawler:
-    def __init__(self, connector, summary_dir, logger, samples_file, sample_limit=100000):
+    repeated_files_warning_ratio = 10
+    # samples fetched for a sampling crawl, reaching it means the population is truncated
+    sampling_population_limit = 10000000
+
+    def __init__(self, connector, summary_dir, logger, samples_file, sample_limit=None,
+                 files_index_file=None, sample_fraction=None, stratify_by=None,
+                 sampling_seed=None, sampling_file=None, profiler=None):
         self.connector = connector
         self.aggregated_paths = {}
         self.sample_regex = r'LP\d{7}-DNA_[A-H](0[1-9]|1[0-2])'
@@ -25,41 +36,112 @@ class CatalogCrawler:
         self.last_file = 1
         self.blacklisted_attributes = ['path', 'uri']
         self.blacklisted_file_endings = ['log']
-        self.sample_limit = sample_limit
+        if sample_limit is not None and sample_fraction is not None:
+            raise ValueError("sample_limit and sample_fraction can't be combined, a sampling "
+                             "crawl draws from the whole catalog")
+        self.sample_limit = sample_limit if sample_limit is not None else 100000
         self.logger = logger
         self.already_processed = self.load_previous_samples(samples_file)
         self.samples_file = open(samples_file, 'a')
+        self.files_index = self.load_files_index(files_index_file or samples_file + '.files')
+        self.added_files = 0
+        self.repeated_files = 0
+        self.sampling = None
+        if sample_fraction is not None:
+            self.sampling = StratifiedSampling(sample_fraction,
+                                               sampling_file or samples_file + '.sampling',
+                                               stratify_by, sampling_seed,
+                                               reset=not self.already_processed)
+        self.sample_counts = {}
+        self.file_weight = 1.0
+        self.profiler = profiler or Profiler.for_summary_dir(summary_dir, 'crawl')
 
     def load_previous_samples(self, samples_file):
+        if not os.path.exists(samples_file):
+            return []
         fh = open(samples_file, 'r')
         result = [line.rstrip('\n') for line in fh]
         fh.close()
         return result
 
+    def load_files_index(self, index_file):
+        # a crawl restarted from an empty samples file must not skip the files seen before
+        reset = not self.already_processed
+        if reset and os.path.exists(index_file) and os.path.getsize(index_file):
+            self.logger.warning("No processed samples, discarding the previous files "
+                                "index {}".format(index_file))
+        return ProcessedFilesIndex(index_file, reset=reset)
+
     def summarize(self):
-        self.logger.info("Getting samples")
-        self.samples = self.connector.get_all_samples(self.sample_limit)
-        self.logger.info("Got {} samples, proceeding...".format(len(self.samples)))
-        print("Got {} samples, proceeding...".format(len(self.samples)))
-
-        for sample in self.samples:
-            if sample['name'] not in self.already_processed:
-                self.logger.info("Getting files for sample {}".format(sample['name']))
-                print("Getting files for sample {}".format(sample['name']))
-
-                files = self.connector.file_get_all_associated_with_sample(sample['name'])
-                self.logger.info("Got {} Files for sample {}".format(len(files), sample['name']))
-                self.process_files(files)
-                self.already_processed.append(sample['name'])
-                self.samples_file.write(sample['name'] + '\n')
-            else:
-                self.logger.info("Sample {} was already processed, ignoring it".format(sample))
+        try:
+            with self.profiler.stage('crawl_get_samples'):
+                self.logger.info("Getting samples")
+                if self.sampling is None:
+                    self.samples = self.connector.get_all_samples(self.sample_limit)
+                else:
+                    self.samples = self.get_sampling_population()
+                self.logger.info("Got {} samples, proceeding...".format(len(self.samples)))
+                print("Got {} samples, proceeding...".format(len(self.samples)))
+                if self.sampling is not None:
+                    self.samples = self.sampling.select(self.samples)
+                    self.sampling.save()
+                    self.logger.info("Sampled {} samples, fraction {}".format(len(self.samples),
+                                                                           self.sampling.fraction))
+
+            with self.profiler.stage('crawl_samples'):
+                for sample in self.samples:
+                    if sample['name'] not in self.already_processed:
+                        with self.profiler.timer('sample', sample['name']):
+                            self.summarize_sample(sample)
+                    else:
+                        self.logger.info("Sample {} was already processed, ignoring it".format(sample))
+            self.logger.info("Summarized {} distinct files, skipped {} repeated ones".format(
+                self.added_files, self.repeated_files))
+            if self.repeated_files > self.repeated_files_warning_ratio * max(self.added_files, 1):
+                self.logger.warning("Skipped {} repeated files but only added {}, check that the "
+                                    "files index matches the samples file".format(self.repeated_files,
+                                                                                   self.added_files))
+        finally:
+            self.profiler.write_report()
+
+    def get_sampling_population(self):
+        samples = self.connector.get_all_samples(self.sampling_population_limit)
+        if len(samples) >= self.sampling_population_limit:
+            raise ValueError("The catalog has at least {} samples, sampling from a truncated "
+                             "population would bias the estimates".format(len(samples)))
+        return samples
+
+    def summarize_sample(self, sample):
+        self.logger.info("Getting files for sample {}".format(sample['name']))
+        print("Getting files for sample {}".format(sample['name']))
+
+        files = self.connector.file_get_all_associated_with_sample(sample['name'])
+        self.logger.info("Got {} Files for sample {}".format(len(files), sample['name']))
+        self.sample_counts = {}
+        self.process_files(files)
+        self.files_index.commit()
+        self.already_processed.append(sample['name'])
+        self.samples_file.write(sample['name'] + '\n')
+        self.samples_file.flush()
+        if self.sampling is not None:
+            self.sampling.record_sample(sample, self.sample_counts)
+            self.sampling.save()
 
     def process_files(self, files):
         for file in files:
-            if self.transform_path(file['path']) not in self.aggregated_paths:
-                self.aggregated_paths[self.transform_path(file['path'])] = {}
-            self.add_file_to_aggregated(file)
+            if self.sampling is not None:
+                self.file_weight = self.inclusion_weight(file)
+            if not self.files_index.add(file):
+                self.repeated_files += 1
+                if self.sampling is not None:
+                    # not written again, but it still counts towards the sample being crawled
+                    self.add_file_to_aggregated(file, self.count_value)
+                continue
+            self.added_files += 1
+            with self.profiler.timer('file', file['path']):
+                if self.transform_path(file['path']) not in self.aggregated_paths:
+                    self.aggregated_paths[self.transform_path(file['path'])] = {}
+                self.add_file_to_aggregated(file)
 
     def should_blacklist_file(self, file):
         for forbiden_ending in self.blacklisted_file_endings:
@@ -67,28 +149,36 @@ class CatalogCrawler:
                 return True
         return False
 
-    def add_file_to_aggregated(self, file):
+    @staticmethod
+    def inclusion_weight(file):
+        """A file linked to k samples counts 1/k towards each of them."""
+        return 1.0 / max(len(file.get('samples') or []), 1)
+
+    def count_value(self, path, attr_value):
+        self.sample_counts[str(path)] = self.sample_counts.get(str(path), 0) + self.file_weight
+
+    def add_file_to_aggregated(self, file, sink=None):
         if not self.should_blacklist_file(file):
             for attr in file:
                 path = self.join_attr_path(":", self.transform_path(file['path']), attr)
-                self.register_attr(attr, file[attr], path)
+                self.register_attr(attr, file[attr], path, sink)
 
     @staticmethod
     def join_attr_path(sep, path, attr):
         return sep.join([path, attr])
 
-    def register_attr(self, attr, attr_value, path):
+    def register_attr(self, attr, attr_value, path, sink=None):
         path = self.transform_path(path)
         if isinstance(attr_value, dict):
             for new_attr in attr_value:
                 new_path = self.join_attr_path(":", path, new_attr)
-                self.register_attr(new_attr, attr_value[new_attr], new_path)
+                self.register_attr(new_attr, attr_value[new_attr], new_path, sink)
         elif isinstance(attr_value, list):
             for subval in attr_value:
-                self.register_attr(attr, subval, path)
+                self.register_attr(attr, subval, path, sink)
         else:
             if attr not in self.blacklisted_attributes:
-                self.send_to_file(path, attr_value)
+                (sink or self.send_to_file)(path, attr_value)
 
     def get_physical_file_path(self, path):
         if path not in self.files_2_code:
@@ -101,6 +191,8 @@ class CatalogCrawler:
         return self.summary_dir + "/" + str(self.files_2_code[path])
 
     def send_to_file(self, path, attr_value):
+        if self.sampling is not None:
+            self.count_value(path, attr_value)
         fh = open(self.get_physical_file_path(str(path)), 'a')
         fh.write(str(attr_value) + "\n")
         fh.close()
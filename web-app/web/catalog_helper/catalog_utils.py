@@ -4,9 +4,6 @@ import os
 import sys
 from traceback import format_exception
 
-from pyCGA.opencgaconfig import ConfigClient
-from pyCGA.opencgarestclients import OpenCGAClient
-
 
 class BerthaOpenCGAException(Exception):
     pass
@@ -79,6 +76,9 @@ class BerthaOpenCGA(object):
 
         # a cache mapping sample lp numbers to OpenCGA sample IDs to reduce number of requests
         self.sample_id_cache = {}
+        # pyCGA is slow to import, only load it once a connector is actually needed
+        from pyCGA.opencgaconfig import ConfigClient
+        from pyCGA.opencgarestclients import OpenCGAClient
         config = ConfigClient.get_basic_config_dict(self.instance_url)
         config['retry'] = dict(
             max_attempts=self.retry_max_attempts,
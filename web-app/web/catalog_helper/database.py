@@ -0,0 +1,96 @@
+"""
+Shared SQLAlchemy engine and session factory for the catalog summary database.
+
+The engine is created on first use from the values in config.py and then
+reused by every API request and batch job in the process, so connections
+come from one pool instead of a new engine per caller. SQLAlchemy itself is
+only imported when a session is first requested.
+"""
+from settings import load_config
+
+_engine = None
+_session_factory = None
+
+
+def database_url():
+    """
+    Builds the database URL from config.py. DB_URL, when set, takes precedence
+    over DB_USER/DB_PASSWORD/DB_HOST/DB_PORT/DB_NAME.
+    """
+    config = load_config()
+    url = getattr(config, 'DB_URL', None)
+    if url:
+        return url
+    return "postgresql://{user}:{password}@{host}:{port}/{name}".format(
+        user=config.DB_USER,
+        password=config.DB_PASSWORD,
+        host=config.DB_HOST,
+        port=config.DB_PORT,
+        name=config.DB_NAME)
+
+
+def pool_options(url):
+    """
+    Connection pool arguments for create_engine. SQLite picks its own pool
+    class, so the Postgres tuning is only applied to server databases.
+    """
+    if url.startswith('sqlite'):
+        return {}
+    return tuned_pool_options()
+
+
+def tuned_pool_options():
+    """QueuePool arguments from the DB_POOL_* values in config.py."""
+    config = load_config()
+    return dict(pool_size=getattr(config, 'DB_POOL_SIZE', 5),
+                max_overflow=getattr(config, 'DB_MAX_OVERFLOW', 10),
+                pool_timeout=getattr(config, 'DB_POOL_TIMEOUT', 30),
+                pool_recycle=getattr(config, 'DB_POOL_RECYCLE', 1800),
+                pool_pre_ping=True)
+
+
+def get_engine(url=None, **engine_options):
+    """
+    Returns the process-wide engine, creating it on the first call.
+    :param url: optional database URL used only when the engine does not exist
+    yet, defaults to database_url()
+    :param engine_options: create_engine arguments overriding pool_options(url),
+    also only used when the engine does not exist yet
+    """
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+        url = url or database_url()
+        options = pool_options(url)
+        options.update(engine_options)
+        _engine = create_engine(url, **options)
+    return _engine
+
+
+def get_session():
+    """
+    Returns the session bound to the current thread. Sessions share the
+    engine's connection pool; call remove_session() when a unit of work ends
+    to hand the connection back.
+    """
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.orm import scoped_session, sessionmaker
+        _session_factory = scoped_session(sessionmaker(bind=get_engine()))
+    return _session_factory()
+
+
+def remove_session():
+    """Closes the current thread's session, if any, returning its connection to the pool."""
+    if _session_factory is not None:
+        _session_factory.remove()
+
+
+def dispose():
+    """Closes every pooled connection and forgets the engine, e.g. after forking a worker."""
+    global _engine, _session_factory
+    remove_session()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = None
+    _session_factory = None
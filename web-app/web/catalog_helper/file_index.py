@@ -0,0 +1,71 @@
+import hashlib
+import os
+
+
+class ProcessedFilesIndex:
+    """
+    Remembers which catalog files have already been summarized so a file linked
+    to several samples (tumour/normal pairs, run level files...) is only counted
+    once. Each file is reduced to a 64 bit digest of its catalog id (or checksum,
+    or path when there is no id) and kept in a set of integers, which stays small
+    enough for millions of files.
+
+    The index is part of the crawl state kept by the processed samples file:
+    digests added for a sample are only appended to index_file by commit(), which
+    the crawler calls when it records the sample as processed, and the index is
+    emptied (reset=True) when the crawl starts again from an empty samples file.
+    """
+
+    key_attrs = ['id', 'checksum', 'path']
+
+    def __init__(self, index_file, reset=False):
+        self.pending = []
+        if reset:
+            self.digests = set()
+            self.index_file = open(index_file, 'w')
+        else:
+            self.digests = self.load_previous_digests(index_file)
+            self.index_file = open(index_file, 'a')
+
+    @staticmethod
+    def load_previous_digests(index_file):
+        if not os.path.exists(index_file):
+            return set()
+        fh = open(index_file, 'r')
+        result = set(int(line, 16) for line in fh if line.strip())
+        fh.close()
+        return result
+
+    def file_key(self, file):
+        for attr in self.key_attrs:
+            if file.get(attr) not in (None, ''):
+                return u"{}:{}".format(attr, file[attr])
+        raise ValueError("File {} has none of the attributes {}".format(file, self.key_attrs))
+
+    def digest(self, file):
+        return int(hashlib.md5(self.file_key(file).encode('utf-8')).hexdigest()[:16], 16)
+
+    def add(self, file):
+        """
+        Registers a file in the index.
+        :return: True if the file was not in the index yet, False if it is a repeat
+        """
+        digest = self.digest(file)
+        if digest in self.digests:
+            return False
+        self.digests.add(digest)
+        self.pending.append(digest)
+        return True
+
+    def commit(self):
+        """Persists the digests added since the last commit."""
+        for digest in self.pending:
+            self.index_file.write("{:016x}\n".format(digest))
+        self.index_file.flush()
+        self.pending = []
+
+    def __len__(self):
+        return len(self.digests)
+
+    def __contains__(self, file):
+        return self.digest(file) in self.digests
@@ -0,0 +1,195 @@
+"""
+Opt-in profiling for crawler and aggregator runs.
+
+Enabled with PROFILING = True in config.py or the CATALOG_PROFILING environment
+variable (1/true/yes, 0/false/no to force it off). When enabled every stage gets
+a cProfile dump and tracemalloc snapshots at its boundaries, and the slowest
+samples/files are kept with their timings. Memory is only traced from the first
+stage until write_report(), and the profiler's own allocations are filtered out
+of the snapshots. Everything is written to
+<summary_dir>.profile/: one <stage>.prof pstats file per stage and a <run>.json
+report with the stage timings, memory usage and slowest items.
+When disabled the stage and timer hooks are shared no-op objects.
+"""
+import heapq
+import json
+import logging
+import os
+import time
+
+from settings import load_config
+
+ENV_VARIABLE = 'CATALOG_PROFILING'
+
+
+def config_value(name, default):
+    try:
+        config = load_config()
+    except ImportError as error:
+        logging.getLogger(__name__).warning("Can't read {} from config.py, using {}: "
+                                            "{}".format(name, default, error))
+        return default
+    return getattr(config, name, default)
+
+
+def is_enabled():
+    value = os.environ.get(ENV_VARIABLE)
+    if value is not None:
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(config_value('PROFILING', False))
+
+
+def slowest_limit():
+    return config_value('PROFILING_SLOWEST', 20)
+
+
+class _Disabled:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        import cProfile
+        self.profiler.start_tracing()
+        self.snapshot = self.profiler.take_snapshot()
+        self.cprofile = cProfile.Profile()
+        self.start = time.time()
+        self.cprofile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cprofile.disable()
+        elapsed = time.time() - self.start
+        memory = self.profiler.compare_snapshot(self.snapshot)
+        self.cprofile.dump_stats(os.path.join(self.profiler.output_dir, self.name + '.prof'))
+        self.profiler.stages[self.name] = dict(seconds=elapsed, memory=memory)
+        return False
+
+
+class _Timer:
+    def __init__(self, profiler, kind, name):
+        self.profiler = profiler
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.record(self.kind, self.name, time.time() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Usage::
+
+        profiler = Profiler.for_summary_dir(summary_dir, 'crawl')
+        with profiler.stage('crawl'):
+            for sample in samples:
+                with profiler.timer('sample', sample['name']):
+                    do_work
+        profiler.write_report()
+    """
+
+    def __init__(self, output_dir, run_name, enabled=False, slowest=20):
+        self.output_dir = output_dir
+        self.run_name = run_name
+        self.enabled = enabled
+        self.slowest = slowest
+        self.stages = {}
+        self.timings = {}
+        self.tracemalloc = None
+        if self.enabled and not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+    @classmethod
+    def for_summary_dir(cls, summary_dir, run_name):
+        return cls(summary_dir.rstrip('/') + '.profile', run_name, is_enabled(), slowest_limit())
+
+    def stage(self, name):
+        if not self.enabled:
+            return _DISABLED
+        return _Stage(self, name)
+
+    def timer(self, kind, name):
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, kind, name)
+
+    def record(self, kind, name, seconds):
+        slowest = self.timings.setdefault(kind, [])
+        if len(slowest) < self.slowest:
+            heapq.heappush(slowest, (seconds, name))
+        else:
+            heapq.heappushpop(slowest, (seconds, name))
+
+    def start_tracing(self):
+        if self.tracemalloc is not None:
+            return
+        try:
+            import tracemalloc
+        except ImportError:
+            return
+        if tracemalloc.is_tracing():
+            # somebody else is tracing, don't take over their session
+            return
+        tracemalloc.start()
+        self.tracemalloc = tracemalloc
+
+    def stop_tracing(self):
+        if self.tracemalloc is not None:
+            self.tracemalloc.stop()
+            self.tracemalloc = None
+
+    def take_snapshot(self):
+        if self.tracemalloc is None:
+            return None
+        import cProfile
+        tracemalloc = self.tracemalloc
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def compare_snapshot(self, snapshot, top=10):
+        if snapshot is None:
+            return None
+        current, peak = self.tracemalloc.get_traced_memory()
+        differences = self.take_snapshot().compare_to(snapshot, 'lineno')[:top]
+        return dict(
+            current_bytes=current,
+            peak_bytes=peak,
+            top_allocations=[dict(location=str(stat.traceback),
+                                  size_diff_bytes=stat.size_diff,
+                                  count_diff=stat.count_diff)
+                             for stat in differences],
+        )
+
+    def write_report(self):
+        if not self.enabled:
+            return None
+        self.stop_tracing()
+        report_path = os.path.join(self.output_dir, self.run_name + '.json')
+        fh = open(report_path, 'w')
+        json.dump(dict(
+            stages=self.stages,
+            slowest=dict((kind, [dict(name=name, seconds=seconds)
+                                 for seconds, name in sorted(slowest, reverse=True)])
+                         for kind, slowest in self.timings.items()),
+        ), fh, indent=2)
+        fh.close()
+        return report_path
@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import random
+
+
+def stratum_somatic(sample):
+    return "cancer" if sample.get('somatic') else "normal"
+
+
+def stratum_lp_prefix(sample):
+    return sample['name'][:6]
+
+
+STRATA = {
+    'somatic': stratum_somatic,
+    'lp_prefix': stratum_lp_prefix,
+}
+
+
+class StratifiedSampling:
+    """
+    Picks a random subset of the catalog samples so a crawl can run on a fraction
+    of the catalog, and keeps the per stratum statistics needed to scale the
+    summaries back up to the whole catalog.
+
+    Samples are grouped with stratify_by (one of STRATA, a function taking a
+    sample, or None for a single uniform stratum) and ceil(fraction * N) samples
+    are drawn from each group. For every attribute path the sum and the sum of
+    squares of the number of values each sampled sample links to are kept per
+    stratum, a file linked to k samples counting 1/k towards each of them so the
+    estimates are of distinct files. They are stored in state_file so interrupted
+    crawls can resume (reset=True starts from scratch). The seed is stored too,
+    a random one being picked when none is given, so a resumed crawl draws the
+    same samples as long as the catalog has not changed.
+    """
+
+    def __init__(self, fraction, state_file, stratify_by=None, seed=None, reset=False):
+        if not 0 < fraction <= 1:
+            raise ValueError("Sampling fraction must be in (0, 1], got {}".format(fraction))
+        self.fraction = fraction
+        self.state_file = state_file
+        if stratify_by is None:
+            self.stratify_by = lambda sample: "all"
+        elif stratify_by in STRATA:
+            self.stratify_by = STRATA[stratify_by]
+        else:
+            self.stratify_by = stratify_by
+        state = {} if reset else self.load_state(state_file)
+        self.strata = state.get('strata', {})
+        self.totals = state.get('totals', {})
+        if state.get('seed') is not None:
+            if seed is not None and seed != state['seed']:
+                raise ValueError("Sampling seed {} differs from the seed {} of the crawl being "
+                                 "resumed in {}".format(seed, state['seed'], state_file))
+            seed = state['seed']
+        elif seed is None:
+            seed = random.SystemRandom().randint(0, 2 ** 32 - 1)
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def load_state(state_file):
+        if not os.path.exists(state_file):
+            return {}
+        fh = open(state_file, 'r')
+        state = json.load(fh)
+        fh.close()
+        return state
+
+    def save(self):
+        # write then rename so a crash never leaves a truncated state file behind
+        tmp_file = self.state_file + '.tmp'
+        fh = open(tmp_file, 'w')
+        json.dump({'fraction': self.fraction, 'seed': self.seed,
+                   'strata': self.strata, 'totals': self.totals}, fh)
+        fh.close()
+        os.rename(tmp_file, self.state_file)
+
+    def stratum(self, sample):
+        return str(self.stratify_by(sample))
+
+    def select(self, samples):
+        by_stratum = {}
+        for i, sample in enumerate(samples):
+            by_stratum.setdefault(self.stratum(sample), []).append(i)
+        selected = set()
+        for stratum, members in by_stratum.items():
+            self.strata.setdefault(stratum, {'sampled': 0})['population'] = len(members)
+            size = int(math.ceil(self.fraction * len(members)))
+            selected.update(self.random.sample(members, size))
+        return [sample for i, sample in enumerate(samples) if i in selected]
+
+    def record_sample(self, sample, counts):
+        """
+        :param sample: a sample that has just been crawled
+        :param counts: dictionary of attribute path -> weighted number of values linked to this sample
+        """
+        stratum = self.stratum(sample)
+        self.strata[stratum]['sampled'] += 1
+        for path, count in counts.items():
+            path_totals = self.totals.setdefault(path, {}).setdefault(stratum, [0, 0])
+            path_totals[0] += count
+            path_totals[1] += count * count
+
+
+def estimate_total(strata, path_totals, z=1.96):
+    """
+    Stratified estimate of the number of values an attribute has in the whole catalog.
+    :param strata: dictionary stratum -> {'population': N, 'sampled': n}
+    :param path_totals: dictionary stratum -> [sum, sum of squares] of the per sample counts
+    :return: (estimated total, lower bound, upper bound) of the z confidence interval
+    """
+    total = 0.0
+    variance = 0.0
+    for stratum, sizes in strata.items():
+        population, sampled = sizes.get('population', 0), sizes['sampled']
+        if not sampled:
+            continue
+        values_sum, squares_sum = path_totals.get(stratum, [0, 0])
+        mean = float(values_sum) / sampled
+        total += population * mean
+        if sampled > 1:
+            sample_variance = (squares_sum - sampled * mean * mean) / (sampled - 1)
+            correction = max(0.0, 1 - float(sampled) / population)
+            variance += population * population * correction * sample_variance / sampled
+    margin = z * math.sqrt(max(0.0, variance))
+    return total, max(0.0, total - margin), total + margin
+
+
+def load_estimates(state_file, z=1.96):
+    """
+    :return: dictionary attribute path -> (estimated total, lower bound, upper bound)
+    """
+    state = StratifiedSampling.load_state(state_file)
+    strata = state.get('strata', {})
+    return dict((path, estimate_total(strata, path_totals, z))
+                for path, path_totals in state.get('totals', {}).items())
@@ -1,3 +1,9 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+
 class SuspiciousAttributes(Base):
     __tablename__ = "suspicious_attributes"
     id = Column(Integer, primary_key=True)
@@ -7,7 +13,7 @@ class SuspiciousAttributes(Base):
 class FileAttributes(Base):
     __tablename__ = "files_attrs_table"
     id = Column(Integer, primary_key=True)
-    attr_id = relationship("AttributesSummary")
+    attr_id = Column(Integer, ForeignKey('attributes_summary.id'))
     file_path = Column(String)
 
     def __repr__(self):
@@ -24,7 +30,9 @@ class AttributesSummary(Base):
     plot_maximum = Column(Float)
     plot_values = Column(String)
     is_numeric = Column(Boolean)
-    file_id = relationship()
+    estimated_total = Column(Float)
+    estimated_total_low = Column(Float)
+    estimated_total_high = Column(Float)
 
     def __repr__(self):
         return "<AttributeSummary(id='%s',plot_title='%s', plot_maximum='%s'," \
@@ -0,0 +1,36 @@
+"""
+Access to the repository config.py for the catalog helpers.
+
+config.py lives at the repository root, which is not on sys.path when the
+crawler or aggregator are run from catalog_helper. load_config() imports it
+normally when it can and otherwise loads it from its place in the tree.
+"""
+import os
+import sys
+import types
+
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                           os.pardir, os.pardir, os.pardir, 'config.py'))
+
+
+def load_config():
+    """
+    :return: the config module. Raises ImportError if config.py can't be found
+    either on sys.path or at CONFIG_PATH.
+    """
+    try:
+        import config
+        return config
+    except ImportError:
+        pass
+    if not os.path.exists(CONFIG_PATH):
+        raise ImportError("config.py is neither importable nor at {}, add the repository "
+                          "root to PYTHONPATH".format(CONFIG_PATH))
+    config = types.ModuleType('config')
+    config.__file__ = CONFIG_PATH
+    fh = open(CONFIG_PATH, 'r')
+    source = fh.read()
+    fh.close()
+    exec(compile(source, CONFIG_PATH, 'exec'), config.__dict__)
+    sys.modules['config'] = config
+    return config